@@ -9,12 +9,16 @@ This replaces:
 from __future__ import annotations
 
 from typing import Any
+from uuid import UUID
 
 from pydantic import BaseModel, Field
+from sqlalchemy import text
+from sqlalchemy.orm.attributes import flag_modified
 
 # ──────────────────────────────────────────────
 # 1. Extend schemas for audio-specific preferences
 # ──────────────────────────────────────────────
+from prefhub.models.mixins import json_serializer
 from prefhub.schemas.preferences import (
     BasePreferences,
 )
@@ -45,11 +49,81 @@ class AudioPreferences(BasePreferences):
 # 2. Implement storage backend (Pattern A: embedded JSONB)
 # ──────────────────────────────────────────────
 
+# The example's SQL, kept in one place. (Hoisting them doesn't change caching:
+# the asyncpg dialect already caches prepared statements per connection, keyed
+# by SQL string, whether text() is built inline or once.)
+
+_LOAD_IF_CHANGED_SQL = text(
+    """
+    SELECT xmin::text::bigint,
+           CASE WHEN xmin::text::bigint = :v THEN NULL
+                ELSE coalesce(settings -> 'preferences', '{}'::jsonb) END
+    FROM users WHERE id = :id
+    """
+)
+
+_LOAD_MANY_SQL = text("SELECT id, settings -> 'preferences' FROM users WHERE id = ANY(CAST(:ids AS uuid[]))")
+
+_SAVE_PREFERENCES_SQL = text(
+    "UPDATE users SET settings = jsonb_set(settings, '{preferences}', CAST(:p AS jsonb)) WHERE id = :id"
+)
+
+_PATCH_PREFERENCES_SQL = text("SELECT prefhub_patch_preferences(CAST(:id AS uuid), CAST(:patch AS jsonb))")
+
+# Run once in a migration; AudioPreferencesService._apply_patch calls it. The
+# merge lives server-side, so the client only sends a trivial call. PL/pgSQL
+# caches the function's plans per backend, which still works behind pgbouncer
+# in transaction mode, where client-side prepared statements don't survive
+# (set prepared_statement_cache_size=0 there).
+PATCH_PREFERENCES_FUNCTION_DDL = """
+-- Recursive jsonb merge with the same semantics as prefhub's deep_merge:
+-- nested objects are merged at every depth, anything else is replaced.
+CREATE OR REPLACE FUNCTION prefhub_jsonb_deep_merge(base jsonb, patch jsonb)
+RETURNS jsonb LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN
+    RETURN base || coalesce((
+        SELECT jsonb_object_agg(
+            p.key,
+            CASE
+                WHEN jsonb_typeof(p.value) = 'object' AND jsonb_typeof(base -> p.key) = 'object'
+                THEN prefhub_jsonb_deep_merge(base -> p.key, p.value)
+                ELSE p.value
+            END
+        )
+        FROM jsonb_each(patch) AS p
+    ), '{}'::jsonb);
+END
+$$;
+
+CREATE OR REPLACE FUNCTION prefhub_patch_preferences(p_user_id uuid, p_patch jsonb)
+RETURNS jsonb LANGUAGE plpgsql AS $$
+DECLARE
+    cur jsonb;
+    merged jsonb;
+BEGIN
+    SELECT coalesce(settings -> 'preferences', '{}'::jsonb) INTO cur FROM users WHERE id = p_user_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    merged := prefhub_jsonb_deep_merge(cur, p_patch);
+    UPDATE users SET settings = jsonb_set(settings, '{preferences}', merged) WHERE id = p_user_id;
+    RETURN merged;
+END
+$$;
+"""
+
 
 class AudioPreferencesService(PreferencesService):
     """
     Storage backend using the existing User.settings JSONB column.
     Minimal change to existing code.
+
+    Assumes the engine was created with `jsonb_engine_kwargs()`, so the driver
+    hands back `settings` already decoded into a dict (the column is NOT NULL).
+
+    Requires PATCH_PREFERENCES_FUNCTION_DDL to have been applied to the
+    database: _apply_patch calls prefhub_patch_preferences, and without it
+    every PATCH fails with an undefined-function error.
     """
 
     def __init__(self, db_session):
@@ -60,18 +134,52 @@ class AudioPreferencesService(PreferencesService):
         user = await self._get_user(user_id)
         if not user:
             return {}
-        settings = user.settings if isinstance(user.settings, dict) else {}
-        return settings.get("preferences", {})
+        return user.settings.get("preferences", {})
+
+    def _cache_scope(self) -> Any:
+        # Services are built per request; xmin versions are comparable across all sessions on one database
+        return str(self.db.bind.url)
+
+    async def _load_raw_if_changed(self, user_id: str, known_version: Any) -> tuple[Any, dict[str, Any] | None]:
+        # xmin is Postgres' row version; skip shipping/parsing the JSONB when it hasn't changed
+        row = (await self.db.execute(_LOAD_IF_CHANGED_SQL, {"id": user_id, "v": known_version})).first()
+        if row is None:
+            return None, {}
+        return row[0], row[1]
+
+    async def _load_raw_many(self, user_ids: list[str]) -> dict[str, dict[str, Any]]:
+        # One round-trip for the whole batch instead of one per user. Rows come
+        # back keyed by UUID; key the result by the caller's own spelling of each
+        # ID (case, hyphens), which is what get_many looks up.
+        result = await self.db.execute(_LOAD_MANY_SQL, {"ids": user_ids})
+        rows = {UUID(str(row_id)): prefs or {} for row_id, prefs in result}
+        return {user_id: rows[key] for user_id in user_ids if (key := UUID(user_id)) in rows}
 
     async def _save_raw(self, user_id: str, data: dict[str, Any]) -> None:
+        # ORM write path. Not called here: _save_raw_bytes below is overridden and
+        # the service always prefers it. Kept for backends that drop the raw UPDATE.
         user = await self._get_user(user_id)
         if not user:
             return
-        settings = dict(user.settings) if isinstance(user.settings, dict) else {}
-        settings["preferences"] = data
-        user.settings = settings
-        # flag_modified(user, "settings")  # needed for SQLAlchemy JSONB
+        user.settings["preferences"] = data
+        flag_modified(user, "settings")  # JSONB isn't mutation-tracked; mark it dirty instead of copying
+        await self.db.commit()
+
+    async def _save_raw_bytes(self, user_id: str, data: bytes) -> None:
+        # Hand the already-serialized JSON to Postgres; no dict -> JSON pass in the driver
+        await self.db.execute(_SAVE_PREFERENCES_SQL, {"p": data.decode(), "id": user_id})
+        await self.db.commit()
+
+    async def _apply_patch(self, user_id: str, patch: dict[str, Any]) -> dict[str, Any]:
+        # Merge inside Postgres: one call instead of SELECT + UPDATE.
+        # Needs PATCH_PREFERENCES_FUNCTION_DDL applied first (see the class docstring).
+        merged = (
+            await self.db.execute(_PATCH_PREFERENCES_SQL, {"patch": json_serializer(patch), "id": user_id})
+        ).scalar()
+        if merged is None:
+            return await super()._apply_patch(user_id, patch)
         await self.db.commit()
+        return merged
 
     async def _get_user(self, user_id: str):
         # Your existing user query logic
@@ -84,6 +192,9 @@ class AudioPreferencesService(PreferencesService):
 
 """
 from prefhub.api import create_preferences_router
+from prefhub.models.mixins import jsonb_engine_kwargs
+
+engine = create_async_engine(DATABASE_URL, **jsonb_engine_kwargs())
 
 preferences_router = create_preferences_router(
     get_service=lambda: AudioPreferencesService(db),
@@ -68,6 +68,9 @@ class IdeaGeneratorPreferences(BasePreferences):
 class IdeaGeneratorPreferencesService(PreferencesService):
     """
     Storage backend using the existing user_settings table.
+
+    Assumes the engine was created with `jsonb_engine_kwargs()`, so the driver
+    hands back `preferences` already decoded into a dict (the column is NOT NULL).
     """
 
     def __init__(self, settings_repo, user_repo):
@@ -80,7 +83,7 @@ class IdeaGeneratorPreferencesService(PreferencesService):
         settings = await self.settings_repo.get_by_user_id(UUID(user_id))
         if not settings:
             return {}
-        return settings.preferences or {}
+        return settings.preferences
 
     async def _save_raw(self, user_id: str, data: dict[str, Any]) -> None:
         from uuid import UUID
@@ -97,6 +100,9 @@ class IdeaGeneratorPreferencesService(PreferencesService):
 
 """
 from prefhub.api import create_preferences_router
+from prefhub.models.mixins import jsonb_engine_kwargs
+
+engine = create_async_engine(DATABASE_URL, **jsonb_engine_kwargs())
 
 preferences_router = create_preferences_router(
     get_service=lambda: IdeaGeneratorPreferencesService(settings_repo, user_repo),
@@ -21,15 +21,35 @@ from __future__ import annotations
 from collections.abc import Callable
 from typing import Any
 
+from pydantic import TypeAdapter, ValidationError
+
 try:
-    from fastapi import APIRouter, Depends
+    from fastapi import APIRouter, Depends, Request, Response
+    from fastapi.exceptions import RequestValidationError
 
     HAS_FASTAPI = True
 except ImportError:
     HAS_FASTAPI = False
 
 from prefhub.schemas.preferences import PreferencesResponse, PreferencesUpdateRequest
-from prefhub.services.preferences import PreferencesService
+from prefhub.services.preferences import _RESPONSE_ADAPTER, PreferencesService
+
+# PATCH bodies are parsed straight from bytes by pydantic-core with one compiled validator
+_UPDATE_ADAPTER = TypeAdapter(PreferencesUpdateRequest)
+# Responses are serialized once by pydantic-core; routes use response_model=None so
+# FastAPI doesn't validate and re-encode the model a second time
+_RESPONSE_DOCS: dict[int | str, dict[str, Any]] = {200: {"model": PreferencesResponse}}
+
+
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def _update_request_openapi() -> dict[str, Any]:
+    """Request body schema for the PATCH route, which reads the raw body itself."""
+    schema = PreferencesUpdateRequest.model_json_schema(ref_template="#/components/schemas/{model}")
+    schema.pop("$defs", None)
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
 
 
 def create_preferences_router(
@@ -55,29 +75,35 @@ def create_preferences_router(
 
     router = APIRouter(prefix=prefix, tags=tags or ["preferences"])
 
-    @router.get("", response_model=PreferencesResponse)
+    @router.get("", response_model=None, responses=_RESPONSE_DOCS)
     async def get_preferences(
         user_id: str = Depends(get_user_id),
         service: PreferencesService = Depends(get_service),
-    ) -> PreferencesResponse:
+    ) -> Response:
         """Get current user preferences with defaults applied."""
-        return await service.get(user_id)
+        return _json_response(await service.get_json(user_id))
 
-    @router.patch("", response_model=PreferencesResponse)
+    @router.patch("", response_model=None, responses=_RESPONSE_DOCS, openapi_extra=_update_request_openapi())
     async def update_preferences(
-        payload: PreferencesUpdateRequest,
+        request: Request,
         user_id: str = Depends(get_user_id),
         service: PreferencesService = Depends(get_service),
-    ) -> PreferencesResponse:
+    ) -> Response:
         """Update user preferences. Only provided fields are merged."""
-        return await service.update(user_id, payload)
-
-    @router.delete("", response_model=PreferencesResponse)
+        try:
+            payload = _UPDATE_ADAPTER.validate_json(await request.body())
+        except ValidationError as e:
+            # Keep FastAPI's "body" prefix on loc so 422s look the same as with a declared body param
+            errors = [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+            raise RequestValidationError(errors, body=await request.body()) from e
+        return _json_response(_RESPONSE_ADAPTER.dump_json(await service.update(user_id, payload)))
+
+    @router.delete("", response_model=None, responses=_RESPONSE_DOCS)
     async def reset_preferences(
         user_id: str = Depends(get_user_id),
         service: PreferencesService = Depends(get_service),
-    ) -> PreferencesResponse:
+    ) -> Response:
         """Reset preferences to defaults."""
-        return await service.reset(user_id)
+        return _json_response(_RESPONSE_ADAPTER.dump_json(await service.reset(user_id)))
 
     return router
@@ -14,33 +14,100 @@ Pattern B (idea-generator style): Separate UserSettings table
         user_id = mapped_column(ForeignKey("users.id"), primary_key=True)
 
 Both patterns store preferences as JSONB, so the service layer works identically.
+
+JSONB codec: by default the driver (de)serializes JSONB with the stdlib `json`
+module. Pass `jsonb_engine_kwargs()` to the engine so every round-trip goes
+through orjson when it is installed:
+
+    engine = create_async_engine(url, **jsonb_engine_kwargs())
+
+With SQLAlchemy's asyncpg dialect this already uses the binary JSONB format.
+For raw asyncpg pools, call `register_jsonb_codec` from the pool's `init` hook.
 """
 
 from __future__ import annotations
 
+import json
 from typing import Any
 
 try:
     from sqlalchemy import text
     from sqlalchemy.dialects.postgresql import JSONB
     from sqlalchemy.orm import Mapped, mapped_column
+    from sqlalchemy.orm.attributes import flag_modified
 
     HAS_SQLALCHEMY = True
 except ImportError:
     HAS_SQLALCHEMY = False
 
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# JSONB binary wire format: a version byte followed by the JSON text.
+_JSONB_VERSION = b"\x01"
+
 
 def _check_sqlalchemy() -> None:
     if not HAS_SQLALCHEMY:
         raise ImportError("SQLAlchemy is required for model mixins. Install with: pip install prefhub[sqlalchemy]")
 
 
+def json_serializer(obj: Any) -> str:
+    """Serialize to JSON text, using orjson when available."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def json_deserializer(data: str | bytes) -> Any:
+    """Parse JSON text, using orjson when available."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def jsonb_engine_kwargs() -> dict[str, Any]:
+    """Engine kwargs that route JSON/JSONB (de)serialization through `json_serializer`/`json_deserializer`."""
+    return {"json_serializer": json_serializer, "json_deserializer": json_deserializer}
+
+
+def _encode_jsonb(value: Any) -> bytes:
+    if HAS_ORJSON:
+        return _JSONB_VERSION + orjson.dumps(value)
+    return _JSONB_VERSION + json.dumps(value).encode()
+
+
+def _decode_jsonb(data: bytes) -> Any:
+    return json_deserializer(data[1:])
+
+
+async def register_jsonb_codec(connection: Any) -> None:
+    """
+    Register a binary JSONB codec on a raw asyncpg connection.
+
+    Values are decoded straight into Python objects, skipping asyncpg's
+    default text round-trip. Use as `asyncpg.create_pool(..., init=register_jsonb_codec)`.
+    """
+    await connection.set_type_codec(
+        "jsonb",
+        encoder=_encode_jsonb,
+        decoder=_decode_jsonb,
+        schema="pg_catalog",
+        format="binary",
+    )
+
+
 class PreferencesEmbeddedMixin:
     """
     Pattern A: Preferences stored inside a `settings` JSONB column on the User table.
     (Like ai-audio-assistant-web)
 
     The `settings` column holds: {"preferences": {...}, ...other stuff...}
+    Configure the engine with `jsonb_engine_kwargs()` for faster JSONB codecs.
     """
 
     if HAS_SQLALCHEMY:
@@ -59,9 +126,14 @@ class PreferencesEmbeddedMixin:
 
     def set_preferences_dict(self, prefs: dict[str, Any]) -> None:
         """Write preferences back into settings."""
-        settings = dict(self.settings) if isinstance(self.settings, dict) else {}  # type: ignore[attr-defined]
-        settings["preferences"] = prefs
-        self.settings = settings  # type: ignore[attr-defined]
+        if not isinstance(self.settings, dict):  # type: ignore[attr-defined]
+            # Not yet flushed (column default not applied): plain assignment is tracked
+            self.settings = {"preferences": prefs}  # type: ignore[attr-defined]
+            return
+        # Mutate in place instead of copying every top-level key; JSONB isn't
+        # mutation-tracked, so mark the attribute dirty explicitly
+        self.settings["preferences"] = prefs  # type: ignore[attr-defined]
+        flag_modified(self, "settings")
 
 
 class PreferencesTableMixin:
@@ -70,6 +142,7 @@ class PreferencesTableMixin:
     (Like idea-generator-web)
 
     The `preferences` column holds the full preferences dict directly.
+    Configure the engine with `jsonb_engine_kwargs()` for faster JSONB codecs.
     """
 
     if HAS_SQLALCHEMY:
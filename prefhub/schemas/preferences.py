@@ -17,7 +17,7 @@ from __future__ import annotations
 
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, SkipValidation
 
 from . import HourCycle, Language, Theme
 
@@ -29,6 +29,8 @@ from . import HourCycle, Language, Theme
 class UIPreferences(BaseModel):
     """Universal UI preferences. Extend this for project-specific needs."""
 
+    model_config = ConfigDict(frozen=True)
+
     language: Language = Field(
         default=Language.ZH_CN,
         description="UI display language",
@@ -56,6 +58,8 @@ class UIPreferences(BaseModel):
 class NotificationPreferences(BaseModel):
     """Universal notification preferences."""
 
+    model_config = ConfigDict(frozen=True)
+
     enabled: bool = Field(
         default=True,
         description="Master switch for notifications",
@@ -74,6 +78,11 @@ class NotificationPreferences(BaseModel):
     )
 
 
+# Frozen, so a single default instance can be shared by every container
+_DEFAULT_UI = UIPreferences()
+_DEFAULT_NOTIFICATIONS = NotificationPreferences()
+
+
 # ──────────────────────────────────────────────
 # Composite preferences container
 # ──────────────────────────────────────────────
@@ -89,11 +98,12 @@ class BasePreferences(BaseModel):
             task_defaults: AudioTaskDefaults = Field(default_factory=AudioTaskDefaults)
     """
 
-    ui: UIPreferences = Field(default_factory=UIPreferences)
-    notifications: NotificationPreferences = Field(default_factory=NotificationPreferences)
+    ui: UIPreferences = Field(default=_DEFAULT_UI)
+    notifications: NotificationPreferences = Field(default=_DEFAULT_NOTIFICATIONS)
 
-    # Extensible: projects can store arbitrary extra prefs here
-    extra: dict[str, Any] = Field(
+    # Extensible: projects can store arbitrary extra prefs here.
+    # Opaque to prefhub and already checked at the API boundary, so it is passed through unvalidated.
+    extra: SkipValidation[dict[str, Any]] = Field(
         default_factory=dict,
         description="Project-specific extra preferences (escape hatch)",
     )
@@ -120,4 +130,4 @@ class PreferencesResponse(BaseModel):
 
     ui: UIPreferences
     notifications: NotificationPreferences
-    extra: dict[str, Any] = Field(default_factory=dict)
+    extra: SkipValidation[dict[str, Any]] = Field(default_factory=dict)
@@ -20,10 +20,24 @@ Usage:
 
 from __future__ import annotations
 
+import asyncio
+import copy
+import json
+import weakref
 from abc import ABC, abstractmethod
-from typing import Any, TypeVar
+from collections import OrderedDict
+from collections.abc import Hashable, Mapping
+from enum import Enum
+from types import MappingProxyType
+from typing import Any, ClassVar, TypeVar
 
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+from prefhub.schemas import HourCycle, Language, Theme
 from prefhub.schemas.preferences import (
+    _DEFAULT_NOTIFICATIONS,
+    _DEFAULT_UI,
     BasePreferences,
     PreferencesResponse,
     PreferencesUpdateRequest,
@@ -31,18 +45,97 @@ from prefhub.schemas.preferences import (
 
 T = TypeVar("T", bound=BasePreferences)
 
+# UI enum fields. With compact_enums they are stored as int codes, which
+# validation won't map back to members by itself. The code tables are part
+# of the stored format: never renumber an entry, only add new ones.
+_UI_ENUM_TYPES: Mapping[str, type[Enum]] = MappingProxyType(
+    {"language": Language, "theme": Theme, "hour_cycle": HourCycle}
+)
+_UI_ENUM_CODES: Mapping[str, Mapping[Enum, int]] = MappingProxyType(
+    {
+        "language": MappingProxyType({Language.ZH_CN: 0, Language.EN: 1, Language.JA: 2}),
+        "theme": MappingProxyType({Theme.SYSTEM: 0, Theme.LIGHT: 1, Theme.DARK: 2}),
+        "hour_cycle": MappingProxyType({HourCycle.AUTO: 0, HourCycle.H12: 1, HourCycle.H23: 2}),
+    }
+)
+_UI_ENUM_MEMBERS: Mapping[str, Mapping[int, Enum]] = MappingProxyType(
+    {name: MappingProxyType({code: member for member, code in codes.items()}) for name, codes in _UI_ENUM_CODES.items()}
+)
+
+
+def _decode_ui_enum(name: str, value: Any) -> Enum:
+    if isinstance(value, int) and not isinstance(value, bool):
+        try:
+            return _UI_ENUM_MEMBERS[name][value]
+        except KeyError:
+            raise ValueError(f"unknown {name} code: {value!r}") from None
+    return _UI_ENUM_TYPES[name](value)
+
+
+def _compact_enums(data: dict[str, Any]) -> dict[str, Any]:
+    """Replace UI enum strings with their int codes. Returns a new dict when anything changes."""
+    ui = data.get("ui")
+    if not isinstance(ui, dict) or ui.keys().isdisjoint(_UI_ENUM_CODES):
+        return data
+    ui = {k: _UI_ENUM_CODES[k].get(v, v) if k in _UI_ENUM_CODES else v for k, v in ui.items()}
+    return {**data, "ui": ui}
+
+
+def _expand_enums(data: dict[str, Any]) -> dict[str, Any]:
+    """Inverse of _compact_enums: turn UI enum codes back into enum members."""
+    ui = data.get("ui")
+    if not isinstance(ui, dict) or ui.keys().isdisjoint(_UI_ENUM_TYPES):
+        return data
+    ui = {k: _decode_ui_enum(k, v) if k in _UI_ENUM_TYPES else v for k, v in ui.items()}
+    return {**data, "ui": ui}
+
+
+# Canonical stored form of the defaults, written verbatim by reset(). Only the
+# bytes are kept: _save_raw backends get a freshly parsed dict on every call.
+_DEFAULT_PREFS_JSON: bytes = BasePreferences().model_dump_json().encode()
+_COMPACT_DEFAULT_PREFS_JSON: bytes = to_json(_compact_enums(json.loads(_DEFAULT_PREFS_JSON)))
+
 
 def deep_merge(base: dict, override: dict) -> dict:
     """
     Deep merge two dicts. override values take precedence.
     Nested dicts are merged recursively; other values are replaced.
+
+    Each level is one C-level dict merge; the loop only recurses where both
+    sides hold a dict. A flat section patch such as {"ui": {"theme": "dark"}}
+    therefore costs two dict merges. Neither input is mutated, and untouched
+    subtrees are shared with base.
     """
-    result = dict(base)
+    result = {**base, **override}
     for key, value in override.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = deep_merge(result[key], value)
-        else:
-            result[key] = value
+        if isinstance(value, dict):
+            current = base.get(key)
+            if isinstance(current, dict):
+                result[key] = deep_merge(current, value)
+    return result
+
+
+_RESPONSE_ADAPTER = TypeAdapter(PreferencesResponse)
+
+
+def _copy_response(response: PreferencesResponse) -> PreferencesResponse:
+    """Copy a shared response. ui/notifications are frozen, so only extra needs a fresh copy."""
+    return response.model_copy(update={"extra": copy.deepcopy(response.extra)})
+
+
+def _dump_fields_set(model: BaseModel) -> dict[str, Any]:
+    """
+    Equivalent of model_dump(exclude_unset=True) that only touches explicitly set fields.
+    Enums are stored by value; nested models fall back to model_dump.
+    """
+    result: dict[str, Any] = {}
+    for name in model.model_fields_set:
+        value = getattr(model, name)
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, BaseModel):
+            value = value.model_dump(exclude_unset=True)
+        result[name] = value
     return result
 
 
@@ -50,8 +143,73 @@ class PreferencesService(ABC):
     """
     Abstract preferences service. Subclass and implement _load_raw / _save_raw
     to plug in your storage backend.
+
+    Backends that can report a cheap row version (e.g. Postgres `xmin`) may
+    also implement _load_raw_if_changed; get() then serves unchanged rows from
+    a process-local LRU cache. The cache belongs to the instance unless
+    _cache_scope returns a store identity, in which case every instance of the
+    subclass with that identity shares it.
+
+    Writes for the same user are serialized with a per-user asyncio.Lock, and
+    PATCHes that queue up behind the lock are coalesced into a single write.
+    Only PATCHes sent through the same instance are coalesced, since another
+    instance may be bound to another store or session. When a service is built
+    per request (e.g. `get_service=lambda: MyService(db)`), writes are still
+    serialized but never coalesced.
+
+    Set `compact_enums = True` to store UI enums as small int codes instead of
+    strings. Rows in either form are read correctly, so it can be enabled on
+    existing data; other readers of the column must understand the codes.
     """
 
+    # Max users kept in each response cache
+    cache_size: ClassVar[int] = 1024
+    compact_enums: ClassVar[bool] = False
+    _scoped_response_caches: ClassVar[dict[Hashable, OrderedDict[str, tuple[Hashable, PreferencesResponse, bytes]]]]
+    _user_locks: ClassVar[weakref.WeakValueDictionary[str, asyncio.Lock]]
+    _pending_patches: ClassVar[
+        dict[str, list[tuple[PreferencesService, dict[str, Any], asyncio.Future[dict[str, Any]]]]]
+    ]
+
+    # Defaults never change at runtime, so validate and serialize them once.
+    # Callers get copies.
+    _default_response: ClassVar[PreferencesResponse] = PreferencesResponse(
+        ui=_DEFAULT_UI,
+        notifications=_DEFAULT_NOTIFICATIONS,
+        extra={},
+    )
+    _default_response_json: ClassVar[bytes] = _RESPONSE_ADAPTER.dump_json(_default_response)
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._scoped_response_caches = {}
+        cls._user_locks = weakref.WeakValueDictionary()
+        cls._pending_patches = {}
+
+    def _cache_scope(self) -> Hashable | None:
+        """
+        Identity of the store behind this instance, e.g. a database URL.
+
+        Row versions are only comparable within one store, so the response cache
+        is shared only between instances reporting the same scope. The default
+        None keeps the cache private to this instance; override it when services
+        are built per request so the cache survives across requests.
+        """
+        return None
+
+    @property
+    def _response_cache(self) -> OrderedDict[str, tuple[Hashable, PreferencesResponse, bytes]]:
+        scope = self._cache_scope()
+        if scope is None:
+            return self.__dict__.setdefault("_instance_response_cache", OrderedDict())
+        return self._scoped_response_caches.setdefault(scope, OrderedDict())
+
+    def _lock_for(self, user_id: str) -> asyncio.Lock:
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            lock = self._user_locks[user_id] = asyncio.Lock()
+        return lock
+
     @abstractmethod
     async def _load_raw(self, user_id: str) -> dict[str, Any]:
         """Load raw preferences dict from storage. Return {} if not found."""
@@ -62,35 +220,159 @@ class PreferencesService(ABC):
         """Persist raw preferences dict to storage."""
         ...
 
+    async def _load_raw_if_changed(
+        self, user_id: str, known_version: Hashable | None
+    ) -> tuple[Hashable | None, dict[str, Any] | None]:
+        """
+        Load preferences unless the stored row version equals known_version.
+
+        Return (version, raw), with raw None when the version is unchanged.
+        A None version disables caching. The default always loads and never caches.
+        """
+        return None, await self._load_raw(user_id)
+
+    async def _load_raw_many(self, user_ids: list[str]) -> dict[str, dict[str, Any]]:
+        """
+        Load raw preferences for several users, keyed by user ID.
+
+        The default calls _load_raw once per user, sequentially: backends often
+        share one session (e.g. an AsyncSession), which forbids concurrent use.
+        Override with a single query (e.g. `WHERE id = ANY(:ids)`), or with
+        asyncio.gather if your backend tolerates concurrent loads.
+        """
+        return {user_id: await self._load_raw(user_id) for user_id in user_ids}
+
+    async def _save_raw_bytes(self, user_id: str, data: bytes) -> None:
+        """
+        Persist preferences given as UTF-8 JSON bytes.
+
+        Override when the backend can write JSON text directly (e.g. a
+        `CAST(:p AS jsonb)` UPDATE) to skip the driver's own dict -> JSON pass.
+        The default parses the bytes and delegates to _save_raw.
+        """
+        await self._save_raw(user_id, json.loads(data))
+
+    async def _persist(self, user_id: str, data: dict[str, Any] | None, data_json: bytes | None = None) -> None:
+        """
+        Write through _save_raw_bytes when overridden, otherwise _save_raw.
+        Either form may be omitted; the other is derived from it.
+        """
+        if type(self)._save_raw_bytes is not PreferencesService._save_raw_bytes:
+            await self._save_raw_bytes(user_id, data_json if data_json is not None else to_json(data))
+        else:
+            await self._save_raw(user_id, data if data is not None else json.loads(data_json))
+
+    async def _apply_patch(self, user_id: str, patch: dict[str, Any]) -> dict[str, Any]:
+        """
+        Merge a patch into stored preferences and return the merged dict.
+
+        The default is a read-modify-write using deep_merge. Backends that can
+        merge server-side (e.g. Postgres `jsonb_set` / `||`) should override this
+        to do it in a single statement.
+        """
+        current_raw = await self._load_raw(user_id)
+        merged = deep_merge(current_raw, patch)
+        await self._persist(user_id, merged)
+        return merged
+
+    def _to_response(self, raw: dict[str, Any]) -> PreferencesResponse:
+        """Build a validated response from stored data."""
+        if not raw:
+            return _copy_response(self._default_response)
+        if self.compact_enums:
+            raw = _expand_enums(raw)
+        # Missing sections fall back to the shared frozen defaults. extra skips
+        # validation, so copy it rather than alias the backend's (possibly live ORM) state.
+        return PreferencesResponse.model_validate(
+            {
+                "ui": _DEFAULT_UI,
+                "notifications": _DEFAULT_NOTIFICATIONS,
+                **raw,
+                "extra": copy.deepcopy(raw.get("extra", {})),
+            }
+        )
+
+    async def _resolve(self, user_id: str) -> tuple[PreferencesResponse, bytes | None, bool]:
+        """
+        Look up a user's response via the version cache.
+
+        Returns (response, json_body, shared). json_body is the pre-serialized
+        response when already known; shared responses must be copied before
+        being handed to callers.
+        """
+        cache = self._response_cache
+        cached = cache.get(user_id)
+        version, raw = await self._load_raw_if_changed(user_id, cached[0] if cached else None)
+        if raw is None and cached is not None and version == cached[0]:
+            cache.move_to_end(user_id)
+            return cached[1], cached[2], True
+
+        if not raw:
+            response, body, shared = self._default_response, self._default_response_json, True
+        else:
+            response, body, shared = self._to_response(raw), None, False
+        if version is not None:
+            if body is None:
+                body = _RESPONSE_ADAPTER.dump_json(response)
+            cache[user_id] = (version, response, body)
+            cache.move_to_end(user_id)
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+            shared = True
+        return response, body, shared
+
     async def get(self, user_id: str) -> PreferencesResponse:
         """Get user preferences with defaults applied."""
-        raw = await self._load_raw(user_id)
-        prefs = BasePreferences(**raw) if raw else BasePreferences()
-        return PreferencesResponse(
-            ui=prefs.ui,
-            notifications=prefs.notifications,
-            extra=prefs.extra,
-        )
+        response, _, shared = await self._resolve(user_id)
+        return _copy_response(response) if shared else response
+
+    async def get_json(self, user_id: str) -> bytes:
+        """
+        Like get(), but returns the serialized JSON body.
+        Defaults and cached rows are served from pre-serialized bytes.
+        """
+        response, body, _ = await self._resolve(user_id)
+        return body if body is not None else _RESPONSE_ADAPTER.dump_json(response)
+
+    async def get_many(self, user_ids: list[str]) -> dict[str, PreferencesResponse]:
+        """Get preferences for several users at once (admin export, cache warming)."""
+        raws = await self._load_raw_many(user_ids)
+        return {user_id: self._to_response(raws.get(user_id, {})) for user_id in user_ids}
 
     async def update(self, user_id: str, request: PreferencesUpdateRequest) -> PreferencesResponse:
         """
         Merge-update preferences. Only provided fields are changed.
         This is the core logic that every project repeats — now centralized.
         """
-        current_raw = await self._load_raw(user_id)
-
         # Build the update dict from non-None fields
         update_dict: dict[str, Any] = {}
         if request.ui is not None:
-            update_dict["ui"] = request.ui.model_dump(exclude_unset=True)
+            update_dict["ui"] = _dump_fields_set(request.ui)
         if request.notifications is not None:
-            update_dict["notifications"] = request.notifications.model_dump(exclude_unset=True)
+            update_dict["notifications"] = _dump_fields_set(request.notifications)
         if request.extra is not None:
             update_dict["extra"] = request.extra
+        if self.compact_enums:
+            update_dict = _compact_enums(update_dict)
 
-        # Deep merge current with updates
-        merged = deep_merge(current_raw, update_dict)
-        await self._save_raw(user_id, merged)
+        # Queue the patch; whoever holds the user's lock next applies every patch
+        # queued through the same instance (and so the same store) in one write
+        done: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        entry = (self, update_dict, done)
+        self._pending_patches.setdefault(user_id, []).append(entry)
+        try:
+            async with self._lock_for(user_id):
+                if not done.done():
+                    await self._flush_patches(user_id, done)
+        except asyncio.CancelledError:
+            # Cancelled while waiting for the lock: withdraw the patch if nobody took it yet
+            queue = self._pending_patches.get(user_id, [])
+            if entry in queue:
+                queue.remove(entry)
+                if not queue:
+                    del self._pending_patches[user_id]
+            raise
+        merged = _expand_enums(done.result())
 
         # Return validated result
         prefs = BasePreferences(**merged)
@@ -100,15 +382,47 @@ class PreferencesService(ABC):
             extra=prefs.extra,
         )
 
+    async def _flush_patches(self, user_id: str, own: asyncio.Future[dict[str, Any]]) -> None:
+        """
+        Apply this instance's queued patches for a user as one combined patch.
+        Caller holds the user's lock. Patches queued by other instances stay queued.
+
+        If the caller is cancelled mid-write, its own patch is dropped and the
+        other waiters' patches go back on the queue for the next lock holder
+        (re-applying a merge patch is idempotent).
+        """
+        queue = self._pending_patches.pop(user_id, [])
+        batch = [entry for entry in queue if entry[0] is self]
+        others = [entry for entry in queue if entry[0] is not self]
+        if others:
+            self._pending_patches[user_id] = others
+        combined: dict[str, Any] = {}
+        for _, patch, _ in batch:
+            combined = deep_merge(combined, patch)
+        self._response_cache.pop(user_id, None)
+        try:
+            merged = await self._apply_patch(user_id, combined)
+        except Exception as e:
+            for _, _, done in batch:
+                done.set_exception(e)
+            return
+        except BaseException:
+            requeue = [entry for entry in batch if entry[2] is not own and not entry[2].done()]
+            if requeue:
+                self._pending_patches[user_id] = requeue + self._pending_patches.get(user_id, [])
+            own.cancel()
+            raise
+        for _, _, done in batch:
+            done.set_result(merged)
+
     async def reset(self, user_id: str) -> PreferencesResponse:
         """Reset to defaults."""
-        defaults = BasePreferences()
-        await self._save_raw(user_id, defaults.model_dump())
-        return PreferencesResponse(
-            ui=defaults.ui,
-            notifications=defaults.notifications,
-            extra=defaults.extra,
-        )
+        async with self._lock_for(user_id):
+            self._response_cache.pop(user_id, None)
+            await self._persist(
+                user_id, None, _COMPACT_DEFAULT_PREFS_JSON if self.compact_enums else _DEFAULT_PREFS_JSON
+            )
+        return _copy_response(self._default_response)
 
 
 class InMemoryPreferencesService(PreferencesService):
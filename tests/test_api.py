@@ -0,0 +1,70 @@
+"""Tests for the FastAPI router factory."""
+
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from prefhub.api import create_preferences_router  # noqa: E402
+from prefhub.services.preferences import InMemoryPreferencesService  # noqa: E402
+
+
+@pytest.fixture
+def client() -> TestClient:
+    service = InMemoryPreferencesService()
+    app = FastAPI()
+    app.include_router(create_preferences_router(get_service=lambda: service, get_user_id=lambda: "user-1"))
+    return TestClient(app)
+
+
+class TestPreferencesRouter:
+    def test_get_defaults(self, client: TestClient):
+        response = client.get("/preferences")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        body = response.json()
+        assert body["ui"] == {"language": "zh-CN", "theme": "system", "timezone": "Asia/Shanghai", "hour_cycle": "auto"}
+        assert body["notifications"]["enabled"] is True
+        assert body["extra"] == {}
+
+    def test_patch_merges(self, client: TestClient):
+        client.patch("/preferences", json={"ui": {"theme": "dark"}})
+        response = client.patch("/preferences", json={"ui": {"language": "en"}, "extra": {"a": {"b": 1}}})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["ui"]["theme"] == "dark"
+        assert body["ui"]["language"] == "en"
+        assert body["extra"] == {"a": {"b": 1}}
+        assert client.get("/preferences").json() == body
+
+    def test_delete_resets(self, client: TestClient):
+        client.patch("/preferences", json={"ui": {"theme": "dark"}})
+        response = client.delete("/preferences")
+        assert response.status_code == 200
+        assert response.json()["ui"]["theme"] == "system"
+        assert client.get("/preferences").json()["ui"]["theme"] == "system"
+
+    def test_patch_invalid_enum(self, client: TestClient):
+        response = client.patch("/preferences", json={"ui": {"theme": "bogus"}})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "ui", "theme"]
+
+    def test_patch_malformed_json(self, client: TestClient):
+        response = client.patch("/preferences", content=b"{bad", headers={"content-type": "application/json"})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"][0] == "body"
+
+    def test_openapi_documents_bodies(self, client: TestClient):
+        schema = client.get("/openapi.json").json()
+        patch = schema["paths"]["/preferences"]["patch"]
+        request_schema = patch["requestBody"]["content"]["application/json"]["schema"]
+        assert set(request_schema["properties"]) == {"ui", "notifications", "extra"}
+        assert "$defs" not in request_schema
+        assert "UIPreferences" in schema["components"]["schemas"]
+        response_schema = patch["responses"]["200"]["content"]["application/json"]["schema"]
+        assert response_schema == {"$ref": "#/components/schemas/PreferencesResponse"}
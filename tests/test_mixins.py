@@ -0,0 +1,109 @@
+"""Tests for the SQLAlchemy mixins and JSONB codecs."""
+
+from __future__ import annotations
+
+import pytest
+
+from prefhub.models import mixins
+from prefhub.models.mixins import (
+    _decode_jsonb,
+    _encode_jsonb,
+    json_deserializer,
+    json_serializer,
+    jsonb_engine_kwargs,
+    register_jsonb_codec,
+)
+
+VALUE = {"ui": {"theme": "dark", "timezone": "Asia/Shanghai"}, "extra": {"tags": ["a", "b"], "n": 1, "ok": None}}
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "stdlib"])
+def orjson_enabled(request, monkeypatch) -> bool:
+    if request.param:
+        pytest.importorskip("orjson")
+    monkeypatch.setattr(mixins, "HAS_ORJSON", request.param)
+    return request.param
+
+
+class TestJsonCodecs:
+    def test_serializer_round_trip(self, orjson_enabled: bool):
+        text = json_serializer(VALUE)
+        assert isinstance(text, str)
+        assert json_deserializer(text) == VALUE
+        assert json_deserializer(text.encode()) == VALUE
+
+    def test_jsonb_framing(self, orjson_enabled: bool):
+        data = _encode_jsonb(VALUE)
+        assert data[:1] == b"\x01"
+        assert json_deserializer(data[1:]) == VALUE
+        assert _decode_jsonb(data) == VALUE
+
+    def test_engine_kwargs(self):
+        assert jsonb_engine_kwargs() == {"json_serializer": json_serializer, "json_deserializer": json_deserializer}
+
+    def test_engine_round_trip(self):
+        sqlalchemy = pytest.importorskip("sqlalchemy")
+        engine = sqlalchemy.create_engine("sqlite://", **jsonb_engine_kwargs())
+        table = sqlalchemy.Table(
+            "prefs", sqlalchemy.MetaData(), sqlalchemy.Column("data", sqlalchemy.JSON, nullable=False)
+        )
+        with engine.begin() as conn:
+            table.create(conn)
+            conn.execute(table.insert(), {"data": VALUE})
+            assert conn.execute(sqlalchemy.select(table.c.data)).scalar_one() == VALUE
+
+    @pytest.mark.asyncio
+    async def test_register_jsonb_codec(self):
+        calls: list[tuple[str, dict]] = []
+
+        class StubConnection:
+            async def set_type_codec(self, typename, **kwargs):
+                calls.append((typename, kwargs))
+
+        await register_jsonb_codec(StubConnection())
+        [(typename, kwargs)] = calls
+        assert typename == "jsonb"
+        assert kwargs["schema"] == "pg_catalog"
+        assert kwargs["format"] == "binary"
+        assert kwargs["decoder"](kwargs["encoder"](VALUE)) == VALUE
+
+
+class TestPreferencesEmbeddedMixin:
+    @pytest.fixture
+    def user_model(self):
+        sqlalchemy = pytest.importorskip("sqlalchemy")
+        from sqlalchemy.orm import DeclarativeBase
+
+        from prefhub.models.mixins import PreferencesEmbeddedMixin
+
+        class Base(DeclarativeBase):
+            pass
+
+        class User(PreferencesEmbeddedMixin, Base):
+            __tablename__ = "users"
+            id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
+
+        return User
+
+    def test_set_preferences_marks_loaded_row_dirty(self, user_model):
+        from sqlalchemy import inspect
+        from sqlalchemy.orm import Session, make_transient_to_detached
+
+        settings = {"preferences": {"ui": {"theme": "light"}}, "other": 1}
+        user = user_model(id=1, settings=settings)
+        make_transient_to_detached(user)  # as if loaded from the database
+        session = Session()
+        session.add(user)
+        assert not session.is_modified(user)
+
+        user.set_preferences_dict({"ui": {"theme": "dark"}})
+        assert user.settings is settings  # updated in place, not copied
+        assert user.settings == {"preferences": {"ui": {"theme": "dark"}}, "other": 1}
+        assert session.is_modified(user)
+        assert inspect(user).attrs.settings.history.has_changes()
+
+    def test_set_preferences_on_unflushed_row(self, user_model):
+        user = user_model(id=1)
+        user.set_preferences_dict({"ui": {"theme": "dark"}})
+        assert user.get_preferences_dict() == {"ui": {"theme": "dark"}}
+        assert user.settings == {"preferences": {"ui": {"theme": "dark"}}}
@@ -2,11 +2,32 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+
 import pytest
+from pydantic import ValidationError
 
 from prefhub.schemas import Language, Theme
-from prefhub.schemas.preferences import NotificationPreferences, PreferencesUpdateRequest, UIPreferences
-from prefhub.services.preferences import InMemoryPreferencesService, deep_merge
+from prefhub.schemas.preferences import (
+    BasePreferences,
+    NotificationPreferences,
+    PreferencesUpdateRequest,
+    UIPreferences,
+)
+from prefhub.services.preferences import _UI_ENUM_CODES, _UI_ENUM_TYPES, InMemoryPreferencesService, deep_merge
+
+
+class BytesPreferencesService(InMemoryPreferencesService):
+    """Backend that receives pre-serialized JSON on write."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.written: list[bytes] = []
+
+    async def _save_raw_bytes(self, user_id: str, data: bytes) -> None:
+        self.written.append(data)
+        await self._save_raw(user_id, json.loads(data))
 
 
 @pytest.fixture
@@ -31,6 +52,28 @@ class TestDeepMerge:
         base = {"a": 1}
         assert deep_merge(base, {}) == {"a": 1}
 
+    def test_flat_override_replaces_nested(self):
+        assert deep_merge({"ui": {"theme": "dark"}, "a": 1}, {"ui": None}) == {"ui": None, "a": 1}
+
+    def test_dict_replaces_scalar(self):
+        assert deep_merge({"ui": "dark", "a": {"b": 1}}, {"ui": {"theme": "dark"}}) == {
+            "ui": {"theme": "dark"},
+            "a": {"b": 1},
+        }
+
+    def test_deeply_nested_merge(self):
+        base = {"extra": {"a": {"b": {"c": 1, "d": 2}}}}
+        override = {"extra": {"a": {"b": {"d": 3}, "e": 4}}}
+        result = deep_merge(base, override)
+        assert result == {"extra": {"a": {"b": {"c": 1, "d": 3}, "e": 4}}}
+
+    def test_inputs_not_mutated(self):
+        base = {"ui": {"theme": "dark"}}
+        override = {"ui": {"theme": "light"}}
+        deep_merge(base, override)
+        assert base == {"ui": {"theme": "dark"}}
+        assert override == {"ui": {"theme": "light"}}
+
 
 class TestPreferencesService:
     @pytest.mark.asyncio
@@ -101,6 +144,33 @@ class TestPreferencesService:
         result = await service.reset("user-1")
         assert result.ui.theme == Theme.SYSTEM
 
+    @pytest.mark.asyncio
+    async def test_reset_stores_canonical_defaults(self, service: InMemoryPreferencesService):
+        """Reset writes the JSON form of the defaults (plain strings, not enum members)."""
+        await service.reset("user-1")
+        stored = await service._load_raw("user-1")
+        assert stored == BasePreferences().model_dump(mode="json")
+        assert type(stored["ui"]["theme"]) is str
+
+    @pytest.mark.asyncio
+    async def test_reset_hands_backend_a_fresh_dict(self):
+        """A backend that keeps and mutates the dict it was given must not change later resets."""
+
+        class ByReferenceService(InMemoryPreferencesService):
+            def __init__(self) -> None:
+                super().__init__()
+                self.rows: dict[str, dict] = {}
+
+            async def _save_raw(self, user_id, data):
+                self.rows[user_id] = data
+
+        service = ByReferenceService()
+        await service.reset("user-1")
+        service.rows["user-1"]["ui"]["theme"] = "dark"
+        service.rows["user-1"]["extra"]["leaked"] = True
+        await service.reset("user-2")
+        assert service.rows["user-2"] == BasePreferences().model_dump(mode="json")
+
     @pytest.mark.asyncio
     async def test_isolation_between_users(self, service: InMemoryPreferencesService):
         """Different users should have independent preferences."""
@@ -110,3 +180,356 @@ class TestPreferencesService:
         )
         result = await service.get("user-2")
         assert result.ui.theme == Theme.SYSTEM  # user-2 still has defaults
+
+    @pytest.mark.asyncio
+    async def test_default_response_not_shared(self, service: InMemoryPreferencesService):
+        """Mutating a returned default must not leak into later responses."""
+        first = await service.get("user-1")
+        first.extra["leak"] = True
+        second = await service.get("user-2")
+        assert second.extra == {}
+
+    @pytest.mark.asyncio
+    async def test_sections_are_frozen(self, service: InMemoryPreferencesService):
+        """Default sections are shared, so they must be immutable."""
+        result = await service.get("user-1")
+        with pytest.raises(ValidationError):
+            result.ui.theme = Theme.DARK
+        with pytest.raises(ValidationError):
+            result.notifications.sound = True
+
+    @pytest.mark.asyncio
+    async def test_get_stored_json(self, service: InMemoryPreferencesService):
+        """Data read back from JSON storage (plain strings, partial sections) keeps defaults."""
+        await service._save_raw("user-1", {"ui": {"theme": "dark"}, "extra": {"k": "v"}})
+        result = await service.get("user-1")
+        assert result.ui.theme is Theme.DARK
+        assert result.ui.language == Language.ZH_CN
+        assert result.notifications.enabled is True
+        assert result.extra == {"k": "v"}
+        assert result.model_dump(mode="json")["ui"]["theme"] == "dark"
+
+    @pytest.mark.asyncio
+    async def test_get_does_not_alias_backend_extra(self):
+        """A backend returning its own live dicts must not see response mutations."""
+        stored = {"extra": {"k": {"v": 1}}}
+
+        class LiveStateService(InMemoryPreferencesService):
+            async def _load_raw(self, user_id):
+                return stored
+
+        result = await LiveStateService().get("user-1")
+        result.extra["k"]["v"] = 2
+        result.extra["new"] = True
+        assert stored == {"extra": {"k": {"v": 1}}}
+
+    @pytest.mark.asyncio
+    async def test_get_validates_stored_data(self, service: InMemoryPreferencesService):
+        """Stored values are coerced like request bodies, and bad rows fail loudly."""
+        await service._save_raw("user-1", {"notifications": {"enabled": "no"}})
+        assert (await service.get("user-1")).notifications.enabled is False
+        await service._save_raw("user-2", {"notifications": {"enabled": "maybe"}})
+        with pytest.raises(ValidationError):
+            await service.get("user-2")
+
+    @pytest.mark.asyncio
+    async def test_partial_sections_round_trip(self, service: InMemoryPreferencesService):
+        """The in-memory store hands back exactly what was saved, like a JSON backend."""
+        data = {"ui": {"theme": "dark"}, "notifications": {}, "extra": {"k": "v"}}
+        await service._save_raw("user-1", data)
+        loaded = await service._load_raw("user-1")
+        assert loaded == data
+        assert type(loaded["ui"]["theme"]) is str
+
+    @pytest.mark.asyncio
+    async def test_unknown_keys_round_trip(self, service: InMemoryPreferencesService):
+        """Extended sections and project-specific keys survive storage unchanged."""
+        data = {"ui": {"theme": "dark", "font_size": 14}, "task_defaults": {"asr_provider": "tencent"}}
+        await service._save_raw("user-1", data)
+        assert await service._load_raw("user-1") == data
+
+    @pytest.mark.asyncio
+    async def test_get_many(self, service: InMemoryPreferencesService):
+        """Bulk read returns each user's preferences, with defaults for unknown users."""
+        await service.update(
+            "user-1",
+            PreferencesUpdateRequest(ui=UIPreferences(theme=Theme.DARK)),
+        )
+        result = await service.get_many(["user-1", "user-2"])
+        assert list(result) == ["user-1", "user-2"]
+        assert result["user-1"].ui.theme == Theme.DARK
+        assert result["user-2"].ui.theme == Theme.SYSTEM
+
+    @pytest.mark.asyncio
+    async def test_get_many_loads_sequentially(self):
+        """The default bulk load must not use the backend concurrently (shared sessions forbid it)."""
+
+        class SessionLikeService(InMemoryPreferencesService):
+            active = 0
+
+            async def _load_raw(self, user_id):
+                assert self.active == 0, "concurrent load"
+                self.active += 1
+                await asyncio.sleep(0)
+                self.active -= 1
+                return await super()._load_raw(user_id)
+
+        result = await SessionLikeService().get_many(["user-1", "user-2", "user-3"])
+        assert len(result) == 3
+
+
+class TestBytesBackend:
+    @pytest.mark.asyncio
+    async def test_update_writes_json_bytes(self):
+        service = BytesPreferencesService()
+        result = await service.update("user-1", PreferencesUpdateRequest(ui=UIPreferences(theme=Theme.DARK)))
+        assert result.ui.theme == Theme.DARK
+        assert json.loads(service.written[-1]) == {"ui": {"theme": "dark"}}
+        assert (await service.get("user-1")).ui.theme == Theme.DARK
+
+    @pytest.mark.asyncio
+    async def test_reset_writes_default_json(self):
+        service = BytesPreferencesService()
+        await service.reset("user-1")
+        assert json.loads(service.written[-1])["ui"]["language"] == "zh-CN"
+
+
+class TestApplyPatchHook:
+    @pytest.mark.asyncio
+    async def test_update_passes_only_patch(self):
+        patches: list[dict] = []
+
+        class PatchingService(InMemoryPreferencesService):
+            async def _apply_patch(self, user_id, patch):
+                patches.append(patch)
+                return await super()._apply_patch(user_id, patch)
+
+        service = PatchingService()
+        await service.update("user-1", PreferencesUpdateRequest(ui=UIPreferences(theme=Theme.DARK)))
+        result = await service.update(
+            "user-1", PreferencesUpdateRequest(notifications=NotificationPreferences(sound=True))
+        )
+        assert patches == [{"ui": {"theme": "dark"}}, {"notifications": {"sound": True}}]
+        assert type(patches[0]["ui"]["theme"]) is str
+        assert result.ui.theme == Theme.DARK
+        assert result.notifications.sound is True
+
+
+class VersionedPreferencesService(InMemoryPreferencesService):
+    """Backend exposing a row version, like Postgres xmin."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.versions: dict[str, int] = {}
+        self.full_loads = 0
+
+    async def _load_raw_if_changed(self, user_id, known_version):
+        version = self.versions.get(user_id, 0)
+        if version == known_version:
+            return version, None
+        self.full_loads += 1
+        return version, await self._load_raw(user_id)
+
+    async def _save_raw(self, user_id, data):
+        await super()._save_raw(user_id, data)
+        self.versions[user_id] = self.versions.get(user_id, 0) + 1
+
+
+class TestResponseCache:
+    @pytest.mark.asyncio
+    async def test_unchanged_version_served_from_cache(self):
+        service = VersionedPreferencesService()
+        await service.update("user-1", PreferencesUpdateRequest(ui=UIPreferences(theme=Theme.DARK)))
+        first = await service.get("user-1")
+        first.extra["leak"] = True  # mutating a response must not poison the cache
+        second = await service.get("user-1")
+        assert service.full_loads == 1
+        assert second.ui.theme == Theme.DARK
+        assert second.extra == {}
+
+    @pytest.mark.asyncio
+    async def test_get_json_matches_get(self):
+        service = VersionedPreferencesService()
+        expected = (await service.get("user-1")).model_dump(mode="json")
+        assert json.loads(await service.get_json("user-1")) == expected
+        await service.update("user-1", PreferencesUpdateRequest(extra={"k": "v"}))
+        body = await service.get_json("user-1")
+        assert json.loads(body)["extra"] == {"k": "v"}
+        assert await service.get_json("user-1") == body
+        assert service.full_loads == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_not_shared_between_stores(self):
+        """Equal row versions from two different stores must not collide."""
+        a, b = VersionedPreferencesService(), VersionedPreferencesService()
+        await a.update("user-1", PreferencesUpdateRequest(ui=UIPreferences(theme=Theme.DARK)))
+        assert (await a.get("user-1")).ui.theme == Theme.DARK
+        await b._save_raw("user-1", {"ui": {"theme": "light"}})  # same version, written outside the service
+        assert a.versions["user-1"] == b.versions["user-1"]
+        assert (await b.get("user-1")).ui.theme == Theme.LIGHT
+
+    @pytest.mark.asyncio
+    async def test_cache_shared_within_scope(self):
+        """Instances reporting the same store identity share cached responses."""
+
+        class ScopedService(VersionedPreferencesService):
+            def _cache_scope(self):
+                return "db-1"
+
+        first, second = ScopedService(), ScopedService()
+        second._store, second.versions = first._store, first.versions
+        await first.update("user-1", PreferencesUpdateRequest(ui=UIPreferences(theme=Theme.DARK)))
+        await first.get("user-1")
+        assert (await second.get("user-1")).ui.theme == Theme.DARK
+        assert second.full_loads == 0
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_cache(self):
+        service = VersionedPreferencesService()
+        await service.get("user-1")
+        await service.update("user-1", PreferencesUpdateRequest(ui=UIPreferences(theme=Theme.DARK)))
+        assert (await service.get("user-1")).ui.theme == Theme.DARK
+        await service.reset("user-1")
+        assert (await service.get("user-1")).ui.theme == Theme.SYSTEM
+        assert service.full_loads == 3
+
+
+class SlowPreferencesService(InMemoryPreferencesService):
+    """Backend whose writes yield to the event loop, to expose races."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    async def _load_raw(self, user_id):
+        raw = await super()._load_raw(user_id)
+        await asyncio.sleep(0)
+        return raw
+
+    async def _save_raw(self, user_id, data):
+        await asyncio.sleep(0)
+        self.writes += 1
+        await super()._save_raw(user_id, data)
+
+
+class TestConcurrentUpdates:
+    @pytest.mark.asyncio
+    async def test_concurrent_updates_not_lost(self):
+        """Concurrent PATCHes for one user must all land, coalesced into fewer writes."""
+        service = SlowPreferencesService()
+        await asyncio.gather(
+            service.update("race-user", PreferencesUpdateRequest(ui=UIPreferences(theme=Theme.DARK))),
+            service.update("race-user", PreferencesUpdateRequest(ui=UIPreferences(language=Language.EN))),
+            service.update("race-user", PreferencesUpdateRequest(notifications=NotificationPreferences(sound=True))),
+        )
+        result = await service.get("race-user")
+        assert result.ui.theme == Theme.DARK
+        assert result.ui.language == Language.EN
+        assert result.notifications.sound is True
+        assert service.writes < 3
+
+    @pytest.mark.asyncio
+    async def test_patches_not_coalesced_across_instances(self):
+        """Concurrent PATCHes through different services must each land in their own store."""
+        a, b = SlowPreferencesService(), SlowPreferencesService()
+        await asyncio.gather(
+            a.update("user-1", PreferencesUpdateRequest(ui=UIPreferences(theme=Theme.DARK))),
+            b.update("user-1", PreferencesUpdateRequest(ui=UIPreferences(language=Language.EN))),
+            a.update("user-1", PreferencesUpdateRequest(notifications=NotificationPreferences(sound=True))),
+        )
+        assert await a._load_raw("user-1") == {"ui": {"theme": "dark"}, "notifications": {"sound": True}}
+        assert await b._load_raw("user-1") == {"ui": {"language": "en"}}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_flush_requeues_waiters(self):
+        """Cancelling the task holding the lock must not strand the patches queued behind it."""
+        writing, release = asyncio.Event(), asyncio.Event()
+
+        class BlockingService(InMemoryPreferencesService):
+            async def _save_raw(self, user_id, data):
+                writing.set()
+                await release.wait()
+                await super()._save_raw(user_id, data)
+
+        service = BlockingService()
+        # Queue both patches behind a held lock so the first flush takes both
+        async with service._lock_for("user-1"):
+            holder = asyncio.create_task(service.update("user-1", PreferencesUpdateRequest(extra={"first": 1})))
+            waiter = asyncio.create_task(service.update("user-1", PreferencesUpdateRequest(extra={"second": 2})))
+            await asyncio.sleep(0)
+        await writing.wait()
+        holder.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await holder
+        release.set()
+        result = await waiter
+        assert result.extra == {"second": 2}
+        assert (await service.get("user-1")).extra == {"second": 2}
+        assert "user-1" not in service._pending_patches
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_withdraws_patch(self):
+        service = SlowPreferencesService()
+        async with service._lock_for("user-1"):
+            task = asyncio.create_task(service.update("user-1", PreferencesUpdateRequest(extra={"a": 1})))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        assert "user-1" not in service._pending_patches
+
+    @pytest.mark.asyncio
+    async def test_failed_write_propagates(self):
+        class FailingService(InMemoryPreferencesService):
+            async def _save_raw(self, user_id, data):
+                raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError, match="db down"):
+            await FailingService().update("fail-user", PreferencesUpdateRequest(extra={"a": 1}))
+
+
+class CompactPreferencesService(InMemoryPreferencesService):
+    compact_enums = True
+
+
+class TestCompactEnums:
+    @pytest.mark.asyncio
+    async def test_enums_stored_as_codes(self):
+        service = CompactPreferencesService()
+        await service.update(
+            "user-1", PreferencesUpdateRequest(ui=UIPreferences(theme=Theme.DARK, language=Language.EN))
+        )
+        assert await service._load_raw("user-1") == {"ui": {"theme": 2, "language": 1}}
+        result = await service.get("user-1")
+        assert result.ui.theme is Theme.DARK
+        assert result.ui.language is Language.EN
+        assert result.model_dump(mode="json")["ui"]["theme"] == "dark"
+
+    @pytest.mark.asyncio
+    async def test_reads_string_rows(self):
+        """Rows written before compact_enums was enabled keep working."""
+        service = CompactPreferencesService()
+        await service._save_raw("user-1", {"ui": {"theme": "dark"}})
+        result = await service.update("user-1", PreferencesUpdateRequest(ui=UIPreferences(language=Language.JA)))
+        assert result.ui.theme is Theme.DARK
+        assert result.ui.language is Language.JA
+
+    @pytest.mark.asyncio
+    async def test_reset_stores_codes(self):
+        service = CompactPreferencesService()
+        await service.reset("user-1")
+        assert (await service._load_raw("user-1"))["ui"]["language"] == 0
+        assert (await service.get("user-1")).ui.language is Language.ZH_CN
+
+    def test_code_tables_cover_every_member(self):
+        for name, enum_type in _UI_ENUM_TYPES.items():
+            assert set(_UI_ENUM_CODES[name]) == set(enum_type)
+            assert len(set(_UI_ENUM_CODES[name].values())) == len(enum_type)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("code", [-1, 7, True])
+    async def test_unknown_code_rejected(self, code):
+        service = CompactPreferencesService()
+        await service._save_raw("user-1", {"ui": {"theme": code}})
+        with pytest.raises(ValueError):
+            await service.get("user-1")